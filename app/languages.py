@@ -1,3 +1,7 @@
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+
 # Dictionary containing translations for English, Turkish, and German
 TRANSLATIONS = {
     "en": {
@@ -126,6 +130,7 @@ TRANSLATIONS = {
         "progress_backup_portainer": "📦 Backing up Portainer Configuration...",
         "progress_no_data": "❌ No data found to backup.",
         "progress_compressing": "🗜️ Compressing archive (this may take a while)...",
+        "progress_compressing_percent": "🗜️ Compressing... {percent}%",
         "progress_compression_failed": "❌ Compression Failed: {error}",
         "progress_uploading": "☁️ Uploading to Cloud...",
         "progress_upload_success": "✅ Cloud Sync Successful. Cleaning up local archive.",
@@ -283,6 +288,7 @@ TRANSLATIONS = {
         "progress_backup_portainer": "📦 Portainer Konfigürasyonu Yedekleniyor...",
         "progress_no_data": "❌ Yedeklenecek veri bulunamadı.",
         "progress_compressing": "🗜️ Arşiv sıkıştırılıyor (bu işlem biraz sürebilir)...",
+        "progress_compressing_percent": "🗜️ Sıkıştırılıyor... %{percent}",
         "progress_compression_failed": "❌ Sıkıştırma Başarısız: {error}",
         "progress_uploading": "☁️ Buluta Yükleniyor...",
         "progress_upload_success": "✅ Bulut Senkronizasyonu Başarılı. Yerel arşiv temizleniyor.",
@@ -440,6 +446,7 @@ TRANSLATIONS = {
         "progress_backup_portainer": "📦 Sichere Portainer-Konfiguration...",
         "progress_no_data": "❌ Keine Daten zum Sichern gefunden.",
         "progress_compressing": "🗜️ Komprimiere Archiv (dies kann eine Weile dauern)...",
+        "progress_compressing_percent": "🗜️ Komprimiere... {percent}%",
         "progress_compression_failed": "❌ Komprimierung fehlgeschlagen: {error}",
         "progress_uploading": "☁️ Hochladen in die Cloud...",
         "progress_upload_success": "✅ Cloud-Synchronisierung erfolgreich. Lokales Archiv wird bereinigt.",
@@ -472,7 +479,30 @@ TRANSLATIONS = {
     }
 }
 
+# Intern language codes, keys and texts once (texts shared across languages are stored once)
+# and freeze the tables: translations are read-only after import, which keeps get_text's cache valid.
+TRANSLATIONS = MappingProxyType({
+    sys.intern(lang): MappingProxyType({sys.intern(key): sys.intern(value) for key, value in table.items()})
+    for lang, table in TRANSLATIONS.items()
+})
+
+# Flat (lang, key) -> text table used by get_text: one dict probe instead of two.
+# TRANSLATIONS is kept for callers that need a whole language table.
+_FLAT = {
+    (lang, key): value
+    for lang, table in TRANSLATIONS.items()
+    for key, value in table.items()
+}
+
+@lru_cache(maxsize=1024)
 def get_text(lang_code, key):
-    """Retrieves translation for the given key and language code."""
-    lang = TRANSLATIONS.get(lang_code, TRANSLATIONS["en"])
-    return lang.get(key, f"[{key}]")
+    """Retrieves translation for the given key and language code, falling back to English."""
+    text = _FLAT.get((lang_code, key))
+    if text is None:
+        text = _FLAT.get(("en", key), f"[{key}]")
+    return text
+
+@lru_cache(maxsize=8)
+def get_table(lang_code):
+    """Returns a read-only key -> text table for one language, with English filling any gaps."""
+    return MappingProxyType({**TRANSLATIONS["en"], **TRANSLATIONS.get(lang_code, {})})
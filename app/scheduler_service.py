@@ -6,13 +6,13 @@ import requests
 import urllib.parse
 import urllib3
 import warnings
+from dataclasses import dataclass
 from dotenv import load_dotenv
-from app.engine import BackupEngine
 
 # Configure Logging
+# basicConfig is a no-op if the root logger already has handlers (e.g. when imported by the UI)
 log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
+os.makedirs(log_dir, exist_ok=True)
 
 logging.basicConfig(
     filename='logs/app.log',
@@ -21,46 +21,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Scheduler")
 
+# Upper bound on how long the loop sleeps before re-checking the env file
+CONFIG_POLL_SECONDS = 60
+
+# Persistent session so heartbeats reuse the keep-alive connection instead of a new TLS handshake per ping
+_HB_SESSION = requests.Session()
+_HB_ADAPTER = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=2)
+_HB_SESSION.mount("https://", _HB_ADAPTER)
+_HB_SESSION.mount("http://", _HB_ADAPTER)
+
+# Heartbeat URLs whose certificate failed verification once (self-signed Kuma);
+# later pings go straight to verify=False instead of failing the TLS check every time
+_HB_INSECURE_URLS = set()
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    """Snapshot of the scheduler settings; compared as a whole to detect config changes."""
+    # Declared by hand: dataclass(slots=True) needs Python 3.10 and the image runs 3.9
+    __slots__ = ("enabled", "backup_time", "hb_url", "hb_interval")
+    enabled: bool
+    backup_time: str
+    hb_url: str
+    hb_interval: int
+
+def _load_config():
+    """Reads the scheduler settings from the (already loaded) environment."""
+    # Backup Settings
+    enabled = os.getenv("SCHEDULE_ENABLE", "false").lower() == "true"
+    backup_time = os.getenv("SCHEDULE_TIME", "03:00")
+
+    # Heartbeat Settings
+    hb_url = os.getenv("HEARTBEAT_URL", "").strip()
+    try:
+        hb_interval = int(os.getenv("HEARTBEAT_INTERVAL", "0"))
+    except ValueError:
+        hb_interval = 0
+
+    return SchedulerConfig(enabled, backup_time, hb_url, hb_interval)
+
 def run_backup_job():
+    # Imported lazily: the engine pulls in the Docker SDK and friends, which the
+    # scheduler doesn't need until a backup actually fires (cached in sys.modules after).
+    from app.engine import BackupEngine
+
     logger.info("⏰ Scheduled Backup Started.")
     # Initialize Engine and Perform Backup
     engine = BackupEngine()
     engine.perform_backup()
 
+def _rewrite_push_url(url):
+    """
+    Returns the URL to ping for a heartbeat.
+    Uptime Kuma push URLs get status=up and an idle message; other URLs are used as-is.
+    Called once per config change, not per ping.
+    """
+    # Uptime Kuma Push Logic
+    if "/api/push/" in url:
+        try:
+            parsed = urllib.parse.urlparse(url)
+            query = urllib.parse.parse_qs(parsed.query)
+            
+            # Set Status=Up and Msg=Idle
+            query['status'] = ['up']
+            query['msg'] = ['System Idle - Waiting for Schedule']
+            
+            # Update query string
+            new_query = urllib.parse.urlencode(query, doseq=True)
+            return urllib.parse.urlunparse(parsed._replace(query=new_query))
+        except Exception:
+            # If parsing fails, use original URL
+            pass
+    return url
+
 def send_heartbeat(url):
     """
-    Sends a heartbeat ping to the specified URL.
+    Sends a heartbeat ping to the specified URL (already rewritten by _rewrite_push_url).
     This runs independently of the backup job to signal 'System is Alive'.
     """
     try:
-        final_url = url
-        
-        # Uptime Kuma Push Logic
-        if "/api/push/" in url:
-             try:
-                 parsed = urllib.parse.urlparse(url)
-                 query = urllib.parse.parse_qs(parsed.query)
-                 
-                 # Set Status=Up and Msg=Idle
-                 query['status'] = ['up']
-                 query['msg'] = ['System Idle - Waiting for Schedule']
-                 
-                 # Update query string
-                 new_query = urllib.parse.urlencode(query, doseq=True)
-                 final_url = urllib.parse.urlunparse(parsed._replace(query=new_query))
-             except Exception:
-                 # If parsing fails, use original URL
-                 final_url = url
-
         # Send Request (GET)
         # We use a short timeout (10s) to not block the scheduler for too long
-        try:
-             requests.get(final_url, timeout=10)
-        except requests.exceptions.SSLError:
-             # Retry with verify=False for self-hosted instances
-             with warnings.catch_warnings():
-                 warnings.simplefilter("ignore", urllib3.exceptions.InsecureRequestWarning)
-                 requests.get(final_url, timeout=10, verify=False)
+        if url not in _HB_INSECURE_URLS:
+            try:
+                _HB_SESSION.get(url, timeout=10)
+                return
+            except requests.exceptions.SSLError:
+                # Self-hosted instance: remember it and retry with verify=False
+                _HB_INSECURE_URLS.add(url)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", urllib3.exceptions.InsecureRequestWarning)
+            _HB_SESSION.get(url, timeout=10, verify=False)
              
     except Exception as e:
         logger.warning(f"Heartbeat failed: {e}")
@@ -69,82 +120,67 @@ def scheduler_loop():
     logger.info("Scheduler Service Started.")
     
     # State tracking to detect config changes
-    current_schedule_enabled = False
-    current_schedule_time = ""
-    current_heartbeat_interval = 0
-    current_heartbeat_url = ""
-    last_env_mtime = 0
+    current_config = None
+    last_env_mtime = None
     
     # Initial load delay
     time.sleep(2)
+
+    # Handle Docker volume mount edge case where .env might be a dir.
+    # The mount layout can't change while the container runs, so resolve it once.
+    env_path = ".env/config.env" if os.path.isdir(".env") else ".env"
     
     while True:
         try:
             # 1. Reload Configuration
-            # Handle Docker volume mount edge case where .env might be a dir
-            env_path = ".env/config.env" if os.path.isdir(".env") else ".env"
-
             # Check modification time to avoid redundant reloads
             try:
-                mtime = os.stat(env_path).st_mtime
+                mtime = os.stat(env_path).st_mtime_ns
             except FileNotFoundError:
                 mtime = 0
 
+            # Only re-read and diff the config when the env file actually changed
             if mtime != last_env_mtime:
-                load_dotenv(dotenv_path=env_path, override=True)
                 last_env_mtime = mtime
+                load_dotenv(dotenv_path=env_path, override=True)
             
-            # 2. Read Backup Settings
-            enabled = os.getenv("SCHEDULE_ENABLE", "false").lower() == "true"
-            backup_time = os.getenv("SCHEDULE_TIME", "03:00")
-            
-            # 3. Read Heartbeat Settings
-            hb_url = os.getenv("HEARTBEAT_URL", "").strip()
-            try:
-                hb_interval = int(os.getenv("HEARTBEAT_INTERVAL", "0"))
-            except ValueError:
-                hb_interval = 0
-            
-            # 4. Check for Changes
-            config_changed = (
-                enabled != current_schedule_enabled or 
-                backup_time != current_schedule_time or
-                hb_url != current_heartbeat_url or
-                hb_interval != current_heartbeat_interval
-            )
+                # 2. Read Settings & Check for Changes
+                config = _load_config()
             
-            if config_changed:
-                logger.info("🔄 Configuration changed. Updating scheduler...")
-                schedule.clear()
+                if config != current_config:
+                    logger.info("🔄 Configuration changed. Updating scheduler...")
+                    schedule.clear()
                 
-                # --- Setup Backup Job ---
-                if enabled:
-                    schedule.every().day.at(backup_time).do(run_backup_job)
-                    logger.info(f"📅 Backup Scheduled for {backup_time}")
-                else:
-                    logger.info("⏸️ Backup Schedule Disabled.")
+                    # --- Setup Backup Job ---
+                    if config.enabled:
+                        schedule.every().day.at(config.backup_time).do(run_backup_job)
+                        logger.info(f"📅 Backup Scheduled for {config.backup_time}")
+                    else:
+                        logger.info("⏸️ Backup Schedule Disabled.")
                 
-                # --- Setup Heartbeat Job ---
-                if hb_url and hb_interval > 0:
-                    schedule.every(hb_interval).minutes.do(send_heartbeat, url=hb_url)
-                    logger.info(f"💓 Heartbeat Enabled: Every {hb_interval} minutes -> {hb_url}")
-                else:
-                    if hb_url:
-                        logger.info("💓 Heartbeat Disabled (Interval is 0).")
+                    # --- Setup Heartbeat Job ---
+                    if config.hb_url and config.hb_interval > 0:
+                        final_hb_url = _rewrite_push_url(config.hb_url)
+                        schedule.every(config.hb_interval).minutes.do(send_heartbeat, url=final_hb_url)
+                        logger.info(f"💓 Heartbeat Enabled: Every {config.hb_interval} minutes -> {config.hb_url}")
                     else:
-                        logger.info("💓 Heartbeat Disabled (No URL).")
+                        if config.hb_url:
+                            logger.info("💓 Heartbeat Disabled (Interval is 0).")
+                        else:
+                            logger.info("💓 Heartbeat Disabled (No URL).")
 
-                # Update State
-                current_schedule_enabled = enabled
-                current_schedule_time = backup_time
-                current_heartbeat_url = hb_url
-                current_heartbeat_interval = hb_interval
+                    # Update State
+                    current_config = config
 
-            # 5. Run Pending Jobs
+            # 3. Run Pending Jobs
             schedule.run_pending()
             
-            # Sleep to prevent high CPU usage
-            time.sleep(10)
+            # Sleep until the next job is due, but wake at least every CONFIG_POLL_SECONDS
+            # so config changes are still picked up (idle_seconds() is None when no jobs exist)
+            idle = schedule.idle_seconds()
+            if idle is None:
+                idle = CONFIG_POLL_SECONDS
+            time.sleep(max(1, min(idle, CONFIG_POLL_SECONDS)))
             
         except Exception as e:
             logger.error(f"Scheduler Loop Error: {e}")
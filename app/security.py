@@ -5,6 +5,13 @@ from cryptography.fernet import Fernet
 # Store key in a persistent location (e.g., mapped volume)
 KEY_FILE = "/backups/secret.key" 
 
+# Marker wrapping encrypted values in .env: ENC(<token>)
+ENC_PREFIX = "ENC("
+_ENC_PREFIX_LEN = len(ENC_PREFIX)
+
+# (key, Fernet) pair reused across calls; a single tuple assignment keeps it thread-safe
+_FERNET = None
+
 @lru_cache(maxsize=1)
 def _get_key():
     """Loads or creates the encryption key."""
@@ -26,31 +33,63 @@ def _get_key():
         print(f"Warning: Could not save encryption key to {KEY_FILE}: {e}")
     return key
 
+def _get_fernet():
+    """Returns a Fernet instance for the current key, constructing it only once per key."""
+    global _FERNET
+    key = _get_key()
+    cached = _FERNET
+    if cached is None or cached[0] != key:
+        cached = (key, Fernet(key))
+        _FERNET = cached
+    return cached[1]
+
 def encrypt_value(value):
     """Encrypts a string value."""
     if not value:
         return ""
     # If already encrypted, don't double encrypt
-    if value.startswith("ENC("):
+    if value.startswith(ENC_PREFIX):
         return value
         
     try:
-        f = Fernet(_get_key())
+        f = _get_fernet()
         token = f.encrypt(value.encode()).decode()
-        return f"ENC({token})"
+        return f"{ENC_PREFIX}{token})"
     except Exception as e:
         print(f"Encryption error: {e}")
         return value
 
+def encrypt_many(values):
+    """Encrypts a list of string values, resolving the key and Fernet instance only once."""
+    try:
+        f = _get_fernet()
+    except Exception as e:
+        print(f"Encryption error: {e}")
+        f = None
+
+    results = []
+    for value in values:
+        if not value:
+            results.append("")
+        elif value.startswith(ENC_PREFIX) or f is None:
+            results.append(value)
+        else:
+            try:
+                results.append(f"{ENC_PREFIX}{f.encrypt(value.encode()).decode()})")
+            except Exception as e:
+                print(f"Encryption error: {e}")
+                results.append(value)
+    return results
+
 def decrypt_value(value):
     """Decrypts a string value if it starts with ENC(."""
     if not value:
         return ""
     
-    if value.startswith("ENC("):
+    if value.startswith(ENC_PREFIX):
         try:
-            token = value[4:-1]
-            f = Fernet(_get_key())
+            token = value[_ENC_PREFIX_LEN:-1]
+            f = _get_fernet()
             return f.decrypt(token.encode()).decode()
         except Exception as e:
             print(f"Decryption error: {e}")
@@ -1,73 +1,267 @@
 # This module creates the Streamlit interface.
 import streamlit as st
 import os
+import errno
+import stat
 import time
 import json
-import secrets
-import collections
+import tempfile
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from app import engine
-from app import api_handlers
-from app.languages import get_text
-from app.security import encrypt_value, decrypt_value
+from app.languages import get_text, get_table
+from app.security import ENC_PREFIX, encrypt_many, decrypt_value
 
 # Constants
 ENV_FILE = ".env"
 APP_VERSION = "v1.1.0"
 SENSITIVE_KEYS = ("PORTAINER_TOKEN", "GOTIFY_TOKEN", "BACKUP_PASSWORD", "WEB_UI_PASSWORD", "WEB_UI_USERNAME")
-
+# Language selector: display names in order, and name -> code
+LANG_PAIRS = (("English", "en"), ("Türkçe", "tr"), ("Deutsch", "de"))
+LANG_NAMES = tuple(name for name, _ in LANG_PAIRS)
+LANG_CODES = dict(LANG_PAIRS)
+STATE_PATH = "/backups/backup_state.json"
+LOG_PATH = "logs/app.log"
+LOG_TAIL_LINES = 200
+LOG_TAIL_BYTES = 64 * 1024
+# Background workers for fire-and-forget notifications (the module is imported once per process)
+_NOTIFY_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="NotifyThread")
+# First "[section]" header of an rclone.conf is used as the remote name
+_RCLONE_SECTION_RE = re.compile(r"^\[(.*?)\]", re.MULTILINE)
+
+@st.cache_resource
+def get_engine():
+    """Returns a single BackupEngine shared across reruns and sessions."""
+    # Imported lazily: the setup wizard never needs the Docker client
+    from app import engine
+    return engine.BackupEngine()
+
+@st.cache_data(ttl=30)
+def get_candidates(_backup_engine):
+    """
+    Lists backup candidates as plain dicts, cached for 30 seconds.
+    Dicts (not Docker objects) keep st.cache_data's pickling cheap and never touch the Docker API on reruns.
+    The leading underscore tells Streamlit not to hash the engine argument.
+    """
+    candidates = []
+    for container in _backup_engine.get_backup_candidates():
+        try:
+            # Prevent N+1 API calls by getting image name from pre-loaded attributes
+            image = container.attrs.get('Config', {}).get('Image') or container.attrs.get('Image')
+        except Exception:
+            image = None
+        candidates.append({
+            "id": container.id,
+            "short_id": container.short_id,
+            "name": container.name,
+            "status": container.status,
+            "image": image,
+        })
+    return candidates
+
+@st.cache_resource
+def get_api_handler():
+    """Returns a shared APIHandler; save_env() drops it so new credentials are picked up."""
+    from app import api_handlers
+    return api_handlers.APIHandler()
+
+def send_notification(title, message, priority=5):
+    """Queues a Gotify notification so the UI doesn't wait on the HTTP round-trip."""
+    _NOTIFY_EXECUTOR.submit(get_api_handler().send_gotify_notification, title, message, priority=priority)
+
+def refresh_candidates():
+    """Forgets the candidate list so the next render lists containers again."""
+    get_candidates.clear()
+    st.session_state.pop("candidates", None)
+
+def stat_rclone_conf(path):
+    """
+    Resolves an rclone config path with one stat per path instead of isdir/exists/isfile.
+    A directory (Docker mount fix) resolves to rclone.conf inside it.
+    Returns (path, mtime); mtime is None unless path is a regular file.
+    """
+    try:
+        info = os.stat(path)
+        if stat.S_ISDIR(info.st_mode):
+            path = os.path.join(path, "rclone.conf")
+            info = os.stat(path)
+    except OSError:
+        return path, None
+    return path, info.st_mtime if stat.S_ISREG(info.st_mode) else None
+
+@st.cache_data(max_entries=8)
+def read_rclone_conf(path, mtime):
+    """
+    Returns (content, remote_name) of an rclone.conf; remote_name is its first section or "remote".
+    mtime is only a cache key, so wizard reruns don't re-read an unchanged file.
+    """
+    try:
+        with open(path, "r") as f:
+            content = f.read()
+    except Exception:
+        return "", "remote"
+    # Auto-detect remote name from existing config
+    match = _RCLONE_SECTION_RE.search(content)
+    return content, match.group(1) if match else "remote"
+
+def load_rclone_prefill(rclone_path):
+    """
+    Returns (real_path, mtime, content, remote_name) for the wizard's rclone path.
+    One stat per render; the parsed file is kept in session state until its path or mtime changes,
+    so the submit-time "unchanged" check never compares against stale content.
+    """
+    # Check if rclone_path is a directory (Docker mount fix)
+    real_path, mtime = stat_rclone_conf(rclone_path)
+    prefill = st.session_state.get("rclone_prefill")
+    if prefill is None or prefill[:2] != (real_path, mtime):
+        content, remote_name = read_rclone_conf(real_path, mtime) if mtime is not None else ("", "remote")
+        prefill = st.session_state.rclone_prefill = (real_path, mtime, content, remote_name)
+    return prefill
+
+@st.cache_data(max_entries=4)
+def load_state(path, mtime_ns):
+    """Parses backup_state.json; mtime_ns is only a cache key so unchanged state isn't re-parsed."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+@st.cache_data(max_entries=4)
+def read_log_tail(path, mtime_ns, size):
+    """
+    Returns the last LOG_TAIL_LINES lines of the log, reading at most LOG_TAIL_BYTES from the end.
+    mtime_ns/size are only cache keys: an unchanged log costs nothing on rerun.
+    """
+    with open(path, "rb") as f:
+        f.seek(max(0, size - LOG_TAIL_BYTES))
+        tail = f.read(LOG_TAIL_BYTES).decode("utf-8", "replace")
+    lines = tail.splitlines()
+    if size > LOG_TAIL_BYTES:
+        lines = lines[1:]  # First line is most likely cut in half
+    return "\n".join(lines[-LOG_TAIL_LINES:])
+
+@st.cache_resource
 def get_env_path():
-    """Determines the correct path for the .env file."""
+    """Determines the correct path for the .env file (resolved once per process)."""
     # If .env is a directory (Docker mount issue), use a file inside it
     if os.path.isdir(ENV_FILE):
         return os.path.join(ENV_FILE, "config.env")
     return ENV_FILE
 
+@st.cache_resource(max_entries=1)
+def load_config(path, mtime_ns):
+    """Loads the .env file into os.environ and returns a snapshot; mtime_ns is only a cache key."""
+    load_dotenv(dotenv_path=path, override=True)
+    return dict(os.environ)
+
+def get_config():
+    """
+    Returns the environment snapshot, re-parsing .env only when its mtime changes.
+    A rerun costs one stat() instead of an open + parse; manual edits to .env are still picked up.
+    """
+    env_path = get_env_path()
+    try:
+        mtime_ns = os.stat(env_path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    return load_config(env_path, mtime_ns)
+
+def _write_text_file(path, payload, fsync=False):
+    """
+    Writes payload through a temp file + os.replace so readers never see a half-written file.
+    Symlinks are followed and the file's permission bits kept (rclone.conf holds credentials).
+    Single-file Docker bind mounts can't be replaced (EBUSY/EXDEV), and a read-only directory
+    can't hold the temp file; those are written in place.
+    """
+    path = os.path.realpath(path)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o600  # New files may hold secrets too
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+        return
+    except OSError as e:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if e.errno not in (errno.EBUSY, errno.EXDEV, errno.EACCES, errno.EPERM, errno.EROFS):
+            raise
+
+    with open(path, "w") as f:
+        f.write(payload)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
 def save_env(updates):
     """Updates the .env file with the given dictionary, preserving existing keys."""
     target_file = get_env_path()
     current_env = {}
     
-    # 1. Read existing
-    if os.path.exists(target_file):
-        try:
-            with open(target_file, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and "=" in line and not line.startswith("#"):
-                        key, value = line.split("=", 1)
-                        current_env[key] = value
-        except Exception:
-            pass
+    # 1. Read existing (a missing file just means first run)
+    try:
+        with open(target_file, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and "=" in line and not line.startswith("#"):
+                    key, value = line.split("=", 1)
+                    current_env[key] = value
+    except Exception:
+        pass
+
+    # 2. Nothing to do if every value is already stored and every stored secret is encrypted
+    # (a hand-edited plaintext secret still needs the rewrite). Sensitive values are compared
+    # decrypted, since re-encrypting the same value always produces a new token.
+    if current_env and all(
+        current_env[key].startswith(ENC_PREFIX) for key in SENSITIVE_KEYS if current_env.get(key)
+    ) and all(
+        (decrypt_value(current_env.get(key)) if key in SENSITIVE_KEYS else current_env.get(key)) == str(value)
+        for key, value in updates.items()
+    ):
+        return True
 
-    # 2. Update with new values
+    # 3. Update with new values
     current_env.update(updates)
     
-    # 3. Encrypt Sensitive Keys
-    for key in SENSITIVE_KEYS:
-        if key in current_env:
-            val = current_env[key]
-            # Performance optimization: check prefix before calling encrypt_value
-            if val and not val.startswith("ENC("):
-                current_env[key] = encrypt_value(val)
+    # 4. Encrypt Sensitive Keys
+    # Performance optimization: check prefix first, then encrypt all pending values in one batch
+    pending = [key for key in SENSITIVE_KEYS if current_env.get(key) and not current_env[key].startswith(ENC_PREFIX)]
+    if pending:
+        encrypted = encrypt_many([current_env[key] for key in pending])
+        current_env.update(zip(pending, encrypted))
 
     try:
-        with open(target_file, "w") as f:
-            for key, value in current_env.items():
-                f.write(f"{key}={value}\n")
-            f.flush()
-            os.fsync(f.fileno())
+        payload = "".join(f"{key}={value}\n" for key, value in current_env.items())
+        # fsync is opt-in: a disk barrier on every save is slow on bind mounts
+        _write_text_file(target_file, payload, fsync=os.getenv("ENV_FSYNC") == "1")
         
         # Force reload env to update python environment immediately
         load_dotenv(dotenv_path=target_file, override=True)
+        # Drop cached config and the engine built from the old values
+        load_config.clear()
+        get_engine.clear()
+        get_api_handler.clear()
         return True
     except Exception as e:
         st.error(f"Error saving settings: {e}")
         return False
 
-def check_password():
-    """Checks if the user is logged in."""
+def init_session_state():
+    """Sets session defaults in one place; setdefault leaves existing values untouched."""
+    st.session_state.setdefault("setup_lang", "en")
+    st.session_state.setdefault("settings_edit_mode", False)
+
+def check_password(cfg):
+    """Checks if the user is logged in; cfg is the environment snapshot from get_config()."""
     if st.session_state.get("password_correct", False):
         return True
 
@@ -75,13 +269,13 @@ def check_password():
     # But Setup handles its own state. 
     # If .env exists but no WEB_UI credentials, default to admin/admin or force setup?
     # Let's check env first.
-    env_user = decrypt_value(os.getenv("WEB_UI_USERNAME"))
-    env_pass = decrypt_value(os.getenv("WEB_UI_PASSWORD"))
+    env_user = decrypt_value(cfg.get("WEB_UI_USERNAME"))
+    env_pass = decrypt_value(cfg.get("WEB_UI_PASSWORD"))
 
     if not env_user or not env_pass:
         # If setup is done but no creds, maybe legacy? Default to admin/admin or let pass?
         # Safe default: if BACKUP_PASSWORD exists (setup done), but no web creds, enforce admin/admin
-        if os.getenv("BACKUP_PASSWORD"):
+        if cfg.get("BACKUP_PASSWORD"):
             env_user = "admin"
             env_pass = "admin"
         else:
@@ -101,7 +295,7 @@ def check_password():
             st.session_state["password_correct"] = False
 
     # Language for Login Screen (Try to detect or default)
-    lang = os.getenv("LANGUAGE", "en")
+    lang = cfg.get("LANGUAGE", "en")
 
     st.set_page_config(page_title="Docker Backup Guard - Login", page_icon="🔒", layout="centered")
     
@@ -122,22 +316,15 @@ def check_password():
 
 def show_setup_wizard():
     """Displays the initial setup wizard."""
-    # Language selection for Setup (default to English initially or session state)
-    if 'setup_lang' not in st.session_state:
-        st.session_state.setup_lang = 'en'
-
-    # Mapping for display names
-    lang_options = {"English": "en", "Türkçe": "tr", "Deutsch": "de"}
-    
     st.set_page_config(page_title="Docker Backup Guard - Setup", page_icon="⚙️", layout="centered")
     
     # Language Selector at the top
     selected_lang_name = st.selectbox(
         "🌍 Language / Dil / Sprache",
-        options=list(lang_options.keys()),
+        options=LANG_NAMES,
         index=0 # Default English
     )
-    st.session_state.setup_lang = lang_options[selected_lang_name]
+    st.session_state.setup_lang = LANG_CODES[selected_lang_name]
     lang = st.session_state.setup_lang
     
     st.title(get_text(lang, "header_setup"))
@@ -164,6 +351,7 @@ def show_setup_wizard():
 
         if st.form_submit_button(get_text(lang, "btn_test_gotify")):
             if gotify_url and gotify_token:
+                from app import api_handlers
                 with st.spinner(get_text(lang, "status_test_running")):
                     res = api_handlers.APIHandler.test_gotify_connection(gotify_url, gotify_token)
                     if res:
@@ -208,25 +396,10 @@ def show_setup_wizard():
         with col9:
             rclone_path = st.text_input(get_text(lang, "label_rclone_path"), value="/app/rclone.conf", help=get_text(lang, "help_rclone_path"))
 
-        # Read existing rclone.conf if available to auto-fill remote name
-        existing_conf = ""
-        default_remote_name = "remote"
-        
-        # Check if rclone_path is a directory (Docker mount fix)
-        if os.path.isdir(rclone_path):
-            rclone_path = os.path.join(rclone_path, "rclone.conf")
-
-        if os.path.exists(rclone_path) and os.path.isfile(rclone_path):
-            try:
-                with open(rclone_path, "r") as f:
-                    existing_conf = f.read()
-                
-                # Auto-detect remote name from existing config
-                match = re.search(r"^\[(.*?)\]", existing_conf, re.MULTILINE)
-                if match:
-                    default_remote_name = match.group(1)
-            except Exception:
-                pass
+        # Read existing rclone.conf if available to auto-fill remote name.
+        # Inside st.form typing doesn't rerun the script; rclone_path only changes on submit,
+        # and the parsed file is kept in session state until the path or its mtime changes.
+        real_rclone_path, rclone_mtime, existing_conf, default_remote_name = load_rclone_prefill(rclone_path)
 
         with col10:
             rclone_remote = st.text_input(get_text(lang, "label_rclone_remote"), value=default_remote_name, help=get_text(lang, "help_rclone_remote"))
@@ -256,6 +429,7 @@ def show_setup_wizard():
 
         if test_conn:
             if portainer_url and portainer_token:
+                from app import api_handlers
                 with st.spinner("Testing connection..."):
                     result = api_handlers.APIHandler.test_portainer_connection(portainer_url, portainer_token)
                     if result:
@@ -270,34 +444,39 @@ def show_setup_wizard():
             if not backup_pass:
                 st.error(get_text(lang, "error_missing_fields"))
             else:
-                # Handle directory case for rclone_path (common Docker issue)
-                real_rclone_path = rclone_path
-                if os.path.isdir(rclone_path):
-                    real_rclone_path = os.path.join(rclone_path, "rclone.conf")
+                # Handle directory case for rclone_path (common Docker issue), already resolved above
+                if real_rclone_path != rclone_path:
                     st.warning(get_text(lang, "warning_rclone_isdir").format(path=rclone_path, new_path=real_rclone_path))
 
-                # Save rclone content if provided
-                if rclone_content.strip():
+                # Save rclone content if provided and different from what is already on disk
+                rclone_unchanged = rclone_mtime is not None and rclone_content == existing_conf
+                if rclone_content.strip() and not rclone_unchanged:
                     try:
-                        # Ensure directory exists
-                        os.makedirs(os.path.dirname(real_rclone_path), exist_ok=True)
-                        with open(real_rclone_path, "w") as f:
-                            f.write(rclone_content)
+                        # Ensure directory exists (an existing file implies its directory does)
+                        rclone_dir = os.path.dirname(real_rclone_path)
+                        if rclone_mtime is None and rclone_dir:
+                            os.makedirs(rclone_dir, exist_ok=True)
+                        _write_text_file(real_rclone_path, rclone_content)
+                        st.session_state.pop("rclone_prefill", None)
                     except Exception as e:
                         st.error(f"Error saving rclone.conf: {e}")
 
                 # Smart Remote Name Detection
                 final_remote_name = rclone_remote
                 if rclone_content.strip():
-                    match = re.search(r"^\[(.*?)\]", rclone_content, re.MULTILINE)
+                    match = _RCLONE_SECTION_RE.search(rclone_content)
                     if match:
                         detected_name = match.group(1)
                         # Override if user didn't change default "remote" or left it empty
                         if rclone_remote.strip() == "remote" or not rclone_remote.strip():
                             final_remote_name = detected_name
 
-                # Generate random salt for encryption
-                random_salt = secrets.token_hex(16)
+                # Keep an existing salt so the stored value stays stable across wizard resubmits;
+                # generate a random one only on first setup
+                random_salt = get_config().get("ENCRYPTION_SALT")
+                if not random_salt:
+                    import secrets
+                    random_salt = secrets.token_hex(16)
                 
                 env_data = {
                     "LANGUAGE": lang,
@@ -324,11 +503,11 @@ def show_setup_wizard():
                     time.sleep(2)
                     st.rerun()
 
-def show_dashboard():
-    """Displays the main control panel with tabs."""
-    # Load env to get language
-    load_dotenv(dotenv_path=get_env_path(), override=True)
-    lang = os.getenv("LANGUAGE", "en")
+def show_dashboard(cfg):
+    """Displays the main control panel with tabs; cfg is the environment snapshot from get_config()."""
+    from app import api_handlers
+
+    lang = cfg.get("LANGUAGE", "en")
     
     st.set_page_config(page_title=get_text(lang, "page_title_dashboard"), page_icon="📦", layout="wide")
     
@@ -344,20 +523,7 @@ def show_dashboard():
     st.title(get_text(lang, "header_dashboard"))
     
     # Initialize Engine (Cached)
-    @st.cache_resource
-    def get_backup_engine():
-        return engine.BackupEngine()
-        
-    backup_engine = get_backup_engine()
-
-    # Cache candidates with TTL (60 seconds)
-    # Performance optimization: Use @st.cache_resource instead of @st.cache_data for Docker objects.
-    # st.cache_data uses pickle to serialize/deserialize objects on every read, which is extremely slow
-    # for complex objects with network client references and causes severe memory overhead.
-    # st.cache_resource stores the direct object reference without serialization.
-    @st.cache_resource(ttl=60)
-    def get_cached_candidates():
-        return backup_engine.get_backup_candidates()
+    backup_engine = get_engine()
 
     # Create Tabs
     tab_dash, tab_settings, tab_actions, tab_logs = st.tabs([
@@ -371,15 +537,11 @@ def show_dashboard():
     with tab_dash:
         st.header(get_text(lang, "header_overview"))
         
-        # Load State
-        state_path = "/backups/backup_state.json"
-        state = {}
-        if os.path.exists(state_path):
-            try:
-                with open(state_path, "r") as f:
-                    state = json.load(f)
-            except:
-                pass
+        # Load State (re-parsed only after the engine rewrites it)
+        try:
+            state = load_state(STATE_PATH, os.stat(STATE_PATH).st_mtime_ns)
+        except OSError:
+            state = {}
         
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -397,7 +559,7 @@ def show_dashboard():
             with st.status(get_text(lang, "status_full_backup_start"), expanded=True) as status:
                 # Check password (decrypt first to verify existence, though checking the encrypted string is also fine for existence)
                 # But perform_backup needs the real password. engine handles decryption.
-                if not os.getenv("BACKUP_PASSWORD"):
+                if not cfg.get("BACKUP_PASSWORD"):
                     st.error(get_text(lang, "error_no_pass"))
                     status.update(label=get_text(lang, "status_failed"), state="error")
                 else:
@@ -407,8 +569,9 @@ def show_dashboard():
 
                     success = backup_engine.perform_backup(progress_callback=update_progress, lang=lang)
                     if success:
+                        refresh_candidates()
                         st.success(get_text(lang, "status_complete"))
-                        api_handlers.APIHandler().send_gotify_notification(
+                        send_notification(
                             get_text(lang, "notif_full_success_title"), 
                             get_text(lang, "notif_full_success_msg")
                         )
@@ -417,7 +580,7 @@ def show_dashboard():
                         st.rerun()
                     else:
                         st.error(get_text(lang, "status_error_process"))
-                        api_handlers.APIHandler().send_gotify_notification(
+                        send_notification(
                             get_text(lang, "notif_full_error_title"), 
                             get_text(lang, "notif_full_error_msg"), priority=8
                         )
@@ -428,9 +591,6 @@ def show_dashboard():
         st.header(get_text(lang, "header_config"))
         
         # Edit Mode Toggle
-        if 'settings_edit_mode' not in st.session_state:
-            st.session_state.settings_edit_mode = False
-            
         def toggle_edit():
             st.session_state.settings_edit_mode = not st.session_state.settings_edit_mode
             
@@ -440,14 +600,13 @@ def show_dashboard():
         
         with st.form("settings_editor"):
             # Language Selection
-            lang_options = {"English": "en", "Türkçe": "tr", "Deutsch": "de"}
-            current_lang_code = os.getenv("LANGUAGE", "en")
-            current_lang_label = next((k for k, v in lang_options.items() if v == current_lang_code), "English")
+            current_lang_code = cfg.get("LANGUAGE", "en")
+            current_lang_index = next((i for i, (_, code) in enumerate(LANG_PAIRS) if code == current_lang_code), 0)
             
             new_lang_label = st.selectbox(
                 get_text(lang, "lang_select_label"),
-                options=list(lang_options.keys()),
-                index=list(lang_options.keys()).index(current_lang_label),
+                options=LANG_NAMES,
+                index=current_lang_index,
                 disabled=disabled
             )
             
@@ -456,42 +615,42 @@ def show_dashboard():
             col_auto1, col_auto2 = st.columns(2)
             with col_auto1:
                 # Scheduler Settings
-                current_enabled = os.getenv("SCHEDULE_ENABLE", "false").lower() == "true"
+                current_enabled = cfg.get("SCHEDULE_ENABLE", "false").lower() == "true"
                 new_schedule_enable = st.checkbox(get_text(lang, "label_schedule_enable"), value=current_enabled, disabled=disabled)
             with col_auto2:
-                new_schedule_time = st.text_input(get_text(lang, "label_schedule_time"), value=os.getenv("SCHEDULE_TIME", "03:00"), help=get_text(lang, "help_schedule_time"), disabled=disabled)
+                new_schedule_time = st.text_input(get_text(lang, "label_schedule_time"), value=cfg.get("SCHEDULE_TIME", "03:00"), help=get_text(lang, "help_schedule_time"), disabled=disabled)
 
             st.markdown("---")
             
             col_s1, col_s2 = st.columns(2)
             with col_s1:
-                new_portainer_url = st.text_input("Portainer URL", value=os.getenv("PORTAINER_URL", ""), disabled=disabled)
-                new_gotify_url = st.text_input("Gotify URL", value=os.getenv("GOTIFY_URL", ""), disabled=disabled)
-                new_healthcheck_url = st.text_input(get_text(lang, "label_healthcheck"), value=os.getenv("HEALTHCHECK_URL", ""), disabled=disabled)
+                new_portainer_url = st.text_input("Portainer URL", value=cfg.get("PORTAINER_URL", ""), disabled=disabled)
+                new_gotify_url = st.text_input("Gotify URL", value=cfg.get("GOTIFY_URL", ""), disabled=disabled)
+                new_healthcheck_url = st.text_input(get_text(lang, "label_healthcheck"), value=cfg.get("HEALTHCHECK_URL", ""), disabled=disabled)
             with col_s2:
                 # Decrypt values for display
-                p_token_display = decrypt_value(os.getenv("PORTAINER_TOKEN", ""))
-                g_token_display = decrypt_value(os.getenv("GOTIFY_TOKEN", ""))
+                p_token_display = decrypt_value(cfg.get("PORTAINER_TOKEN", ""))
+                g_token_display = decrypt_value(cfg.get("GOTIFY_TOKEN", ""))
                 
                 new_portainer_token = st.text_input("Portainer Token", value=p_token_display, type="password", disabled=disabled)
                 new_gotify_token = st.text_input("Gotify Token", value=g_token_display, type="password", disabled=disabled)
-                new_retention = st.number_input("Retention (Days)", value=int(os.getenv("RETENTION_DAYS", "7")), min_value=1, disabled=disabled)
-                new_tz = st.text_input("Timezone", value=os.getenv("TZ", "Europe/Berlin"), disabled=disabled)
+                new_retention = st.number_input("Retention (Days)", value=int(cfg.get("RETENTION_DAYS", "7")), min_value=1, disabled=disabled)
+                new_tz = st.text_input("Timezone", value=cfg.get("TZ", "Europe/Berlin"), disabled=disabled)
             
             col_hb1, col_hb2 = st.columns(2)
             with col_hb1:
-                 new_heartbeat_url = st.text_input(get_text(lang, "label_heartbeat_url"), value=os.getenv("HEARTBEAT_URL", ""), disabled=disabled, help=get_text(lang, "help_heartbeat_url"))
+                 new_heartbeat_url = st.text_input(get_text(lang, "label_heartbeat_url"), value=cfg.get("HEARTBEAT_URL", ""), disabled=disabled, help=get_text(lang, "help_heartbeat_url"))
             with col_hb2:
-                 new_heartbeat_interval = st.number_input(get_text(lang, "label_heartbeat_interval"), value=int(os.getenv("HEARTBEAT_INTERVAL", "0")), min_value=0, disabled=disabled, help=get_text(lang, "help_heartbeat_interval"))
+                 new_heartbeat_interval = st.number_input(get_text(lang, "label_heartbeat_interval"), value=int(cfg.get("HEARTBEAT_INTERVAL", "0")), min_value=0, disabled=disabled, help=get_text(lang, "help_heartbeat_interval"))
 
             st.markdown("---")
             st.subheader(get_text(lang, "header_login"))
             col_w1, col_w2 = st.columns(2)
             with col_w1:
-                web_user_display = decrypt_value(os.getenv("WEB_UI_USERNAME", "admin"))
+                web_user_display = decrypt_value(cfg.get("WEB_UI_USERNAME", "admin"))
                 new_web_ui_username = st.text_input(get_text(lang, "label_web_ui_username"), value=web_user_display, disabled=disabled)
             with col_w2:
-                web_pass_display = decrypt_value(os.getenv("WEB_UI_PASSWORD", "admin"))
+                web_pass_display = decrypt_value(cfg.get("WEB_UI_PASSWORD", "admin"))
                 new_web_ui_password = st.text_input(get_text(lang, "label_web_ui_password"), value=web_pass_display, type="password", disabled=disabled)
 
             st.markdown("---")
@@ -527,7 +686,7 @@ def show_dashboard():
             
             if submitted:
                 env_updates = {
-                    "LANGUAGE": lang_options[new_lang_label],
+                    "LANGUAGE": LANG_CODES[new_lang_label],
                     "SCHEDULE_ENABLE": str(new_schedule_enable).lower(),
                     "SCHEDULE_TIME": new_schedule_time,
                     "PORTAINER_URL": new_portainer_url,
@@ -552,14 +711,11 @@ def show_dashboard():
         st.markdown("---")
         st.subheader(get_text(lang, "subheader_rclone_editor"))
         
-        rclone_path = os.getenv("RCLONE_CONFIG_PATH", "/app/rclone.conf")
-        
         # Check if rclone_path is a directory (Docker mount fix)
-        if os.path.isdir(rclone_path):
-            rclone_path = os.path.join(rclone_path, "rclone.conf")
+        rclone_path, rclone_mtime = stat_rclone_conf(cfg.get("RCLONE_CONFIG_PATH", "/app/rclone.conf"))
 
         rclone_content = ""
-        if os.path.exists(rclone_path) and os.path.isfile(rclone_path):
+        if rclone_mtime is not None:
             try:
                 with open(rclone_path, "r") as f:
                     rclone_content = f.read()
@@ -572,8 +728,7 @@ def show_dashboard():
         
         if st.button(get_text(lang, "btn_save_rclone"), disabled=disabled):
             try:
-                with open(rclone_path, "w") as f:
-                    f.write(new_rclone_content)
+                _write_text_file(rclone_path, new_rclone_content)
                 st.success(get_text(lang, "status_rclone_saved"))
             except OSError as e:
                 if "Read-only file system" in str(e) or e.errno == 30:
@@ -592,7 +747,7 @@ def show_dashboard():
         with col_p1:
             if st.button(get_text(lang, "btn_backup_portainer"), type="secondary"):
                 with st.status(get_text(lang, "status_backup_portainer_start"), expanded=True) as status:
-                    if not os.getenv("BACKUP_PASSWORD"):
+                    if not cfg.get("BACKUP_PASSWORD"):
                          st.error(get_text(lang, "error_no_pass"))
                          status.update(label=get_text(lang, "status_failed"), state="error")
                     else:
@@ -606,86 +761,101 @@ def show_dashboard():
         
         st.markdown("---")
 
-        candidates = get_cached_candidates()
-        st.subheader(f"{get_text(lang, 'subheader_candidates')} ({len(candidates)})")
-        
-        if st.button("🔄 Refresh List"):
-            get_cached_candidates.clear()
-            st.rerun()
-
-        if not candidates:
-            st.warning(get_text(lang, "warning_no_candidates"))
-        else:
-            for container in candidates:
-                with st.expander(f"📦 {container.name} ({container.short_id})"):
-                    st.write(f"**{get_text(lang, 'label_status')}:** {container.status}")
-                    try:
-                        # Prevent N+1 API calls by getting image name from pre-loaded attributes
-                        image_tags = container.attrs.get('Config', {}).get('Image') or container.attrs.get('Image')
-                    except Exception:
-                        image_tags = get_text(lang, "unknown_permission_denied")
-                    st.write(f"**{get_text(lang, 'label_image')}:** {image_tags}")
-                    
-                    if st.button(get_text(lang, "btn_backup").format(name=container.name), key=f"btn_{container.id}"):
-                        with st.status(get_text(lang, "status_backing_up").format(name=container.name), expanded=True) as status:
-                            if not os.getenv("BACKUP_PASSWORD"):
-                                 st.error(get_text(lang, "error_no_pass"))
-                                 status.update(label=get_text(lang, "status_failed"), state="error")
-                            else:
-                                # Define callback for real-time progress updates
-                                def update_progress(msg):
-                                    status.write(msg)
-                                    
-                                success = backup_engine.perform_backup(container_id=container.id, progress_callback=update_progress)
-                                if success:
-                                    st.success(get_text(lang, "status_complete"))
-                                    api_handlers.APIHandler().send_gotify_notification(
-                                        get_text(lang, "notif_success_title"), 
-                                        get_text(lang, "notif_success_msg").format(name=container.name)
-                                    )
-                                    status.update(label=get_text(lang, "status_complete"), state="complete")
-                                else:
-                                    st.error(get_text(lang, "status_error_process"))
-                                    api_handlers.APIHandler().send_gotify_notification(
-                                        get_text(lang, "notif_error_title"), 
-                                        get_text(lang, "notif_error_msg").format(name=container.name), priority=8
-                                    )
-                                    status.update(label=get_text(lang, "status_error_label"), state="error")
+        show_candidates(backup_engine, cfg, lang)
 
     # --- TAB 4: LOGS ---
     with tab_logs:
-        st.header(get_text(lang, "header_logs"))
+        show_logs(lang)
+
+@st.fragment
+def show_candidates(backup_engine, cfg, lang):
+    """Candidate list; as a fragment, expanding entries or clicking buttons reruns only this section."""
+    # Keep the list per session; only "Refresh" or a finished backup re-lists containers
+    if "candidates" not in st.session_state:
+        st.session_state.candidates = get_candidates(backup_engine)
+    candidates = st.session_state.candidates
+    st.subheader(f"{get_text(lang, 'subheader_candidates')} ({len(candidates)})")
+    
+    # on_click runs before the next rerun, so no explicit st.rerun() is needed
+    st.button("🔄 Refresh List", on_click=refresh_candidates)
+
+    if not candidates:
+        st.warning(get_text(lang, "warning_no_candidates"))
+    else:
+        # Loop-invariant labels, looked up once per render instead of once per container
+        t = get_table(lang)
+        label_status = t["label_status"]
+        label_image = t["label_image"]
+        unknown_image = t["unknown_permission_denied"]
+        btn_backup = t["btn_backup"]
+        status_backing_up = t["status_backing_up"]
+
+        for container in candidates:
+            name = container["name"]
+            with st.expander(f"📦 {name} ({container['short_id']})"):
+                st.write(f"**{label_status}:** {container['status']}")
+                st.write(f"**{label_image}:** {container['image'] or unknown_image}")
+                
+                if st.button(btn_backup.format(name=name), key=f"btn_{container['id']}"):
+                    with st.status(status_backing_up.format(name=name), expanded=True) as status:
+                        if not cfg.get("BACKUP_PASSWORD"):
+                             st.error(get_text(lang, "error_no_pass"))
+                             status.update(label=get_text(lang, "status_failed"), state="error")
+                        else:
+                            # Define callback for real-time progress updates
+                            def update_progress(msg):
+                                status.write(msg)
+                                
+                            success = backup_engine.perform_backup(container_id=container["id"], progress_callback=update_progress)
+                            if success:
+                                refresh_candidates()
+                                st.success(get_text(lang, "status_complete"))
+                                send_notification(
+                                    get_text(lang, "notif_success_title"), 
+                                    get_text(lang, "notif_success_msg").format(name=name)
+                                )
+                                status.update(label=get_text(lang, "status_complete"), state="complete")
+                            else:
+                                st.error(get_text(lang, "status_error_process"))
+                                send_notification(
+                                    get_text(lang, "notif_error_title"), 
+                                    get_text(lang, "notif_error_msg").format(name=name), priority=8
+                                )
+                                status.update(label=get_text(lang, "status_error_label"), state="error")
+
+@st.fragment
+def show_logs(lang):
+    """Logs tab; as a fragment its buttons rerun only this tab, not the whole app."""
+    st.header(get_text(lang, "header_logs"))
+    
+    col_l1, col_l2 = st.columns([1, 4])
+    with col_l1:
+        # Any click inside the fragment already reruns it, so no st.rerun() is needed
+        st.button(get_text(lang, "btn_refresh_logs"))
+    with col_l2:
+        if st.button(get_text(lang, "btn_clear_logs"), type="primary"):
+            if os.path.exists(LOG_PATH):
+                with open(LOG_PATH, "w") as f:
+                    f.write("") # Clear file
+                st.success(get_text(lang, "status_logs_cleared"))
         
-        col_l1, col_l2 = st.columns([1, 4])
-        with col_l1:
-            if st.button(get_text(lang, "btn_refresh_logs")):
-                st.rerun()
-        with col_l2:
-            if st.button(get_text(lang, "btn_clear_logs"), type="primary"):
-                log_path = "logs/app.log"
-                if os.path.exists(log_path):
-                    with open(log_path, "w") as f:
-                        f.write("") # Clear file
-                    st.success(get_text(lang, "status_logs_cleared"))
-                    time.sleep(1)
-                    st.rerun()
-            
-        log_path = "logs/app.log"
-        if os.path.exists(log_path):
-            with open(log_path, "r") as f:
-                # Read last 200 lines efficiently without loading entire file into memory
-                lines = collections.deque(f, maxlen=200)
-                log_content = "".join(lines)
-            st.code(log_content, language="log")
-        else:
-            st.info("No logs found.")
+    try:
+        log_stat = os.stat(LOG_PATH)
+    except OSError:
+        log_stat = None
+    if log_stat:
+        st.code(read_log_tail(LOG_PATH, log_stat.st_mtime_ns, log_stat.st_size), language="log")
+    else:
+        st.info("No logs found.")
 
 def run():
-    # Force reload env to get the latest values
-    load_dotenv(dotenv_path=get_env_path(), override=True)
+    init_session_state()
+
+    # Load env once per process; save_env() refreshes it
+    cfg = get_config()
     
     # Check if critical configuration exists
-    backup_password = os.getenv("BACKUP_PASSWORD")
+    backup_password = cfg.get("BACKUP_PASSWORD")
     
     # If password is missing or empty, show setup
     if not backup_password:
@@ -693,11 +863,8 @@ def run():
         return
 
     # Check Authentication
-    if not check_password():
+    if not check_password(cfg):
         st.stop()  # Stop execution if not logged in
 
-    # Scheduler is now started via entrypoint.sh as a separate process.
-    # We no longer start it here to avoid duplication and dependency on UI session.
-    # start_scheduler()
-    
-    show_dashboard()
+    # The scheduler runs as a separate process started by entrypoint.sh, not from the UI session.
+    show_dashboard(cfg)
@@ -1,4 +1,9 @@
+import json
+import os
+import shutil
+import subprocess
 import sys
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -53,5 +58,127 @@ class TestBackupEngine(unittest.TestCase):
         self.assertEqual(mock_sleep.call_count, 3)
         mock_sleep.assert_called_with(5)
 
+    def test_dedupe_subtree_paths_drops_nested_mounts(self):
+        paths = {"/hostfs/data/subdir", "/hostfs/data", "/hostfs/data-other", "/hostfs/opt/app"}
+
+        result = BackupEngine._dedupe_subtree_paths(paths)
+
+        self.assertEqual(result, ["/hostfs/data", "/hostfs/data-other", "/hostfs/opt/app"])
+
+    def test_update_state_file_preserves_last_success(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.engine.backup_root = tmp
+            self.engine._state_cache = None
+            self.engine._state_mtime = None
+
+            self.engine._update_state_file("success", 1024, 2)
+            self.engine._update_state_file("failed", 0, 2)
+
+            with open(os.path.join(tmp, "backup_state.json")) as f:
+                data = json.load(f)
+            self.assertEqual(data["last_status"], "failed")
+            self.assertEqual(data["last_size_bytes"], 1024)
+            self.assertIn("last_success", data)
+            self.assertEqual(os.listdir(tmp), ["backup_state.json"])
+
+    def test_update_state_file_rereads_external_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            state_path = os.path.join(tmp, "backup_state.json")
+            self.engine.backup_root = tmp
+            self.engine._state_cache = None
+            self.engine._state_mtime = None
+
+            self.engine._update_state_file("success", 1024, 2)
+            # Another process (scheduler vs. UI) rewrites the file in between
+            with open(state_path) as f:
+                data = json.load(f)
+            data["last_success"] = "2030-01-01 00:00:00"
+            with open(state_path, "w") as f:
+                json.dump(data, f)
+            st = os.stat(state_path)
+            os.utime(state_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+            self.engine._update_state_file("failed", 0, 2)
+
+            with open(state_path) as f:
+                data = json.load(f)
+            self.assertEqual(data["last_success"], "2030-01-01 00:00:00")
+            self.assertEqual(data["last_status"], "failed")
+
+    def test_update_state_file_failed_write_keeps_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.engine.backup_root = tmp
+            self.engine._state_cache = None
+            self.engine._state_mtime = None
+            self.engine._update_state_file("success", 1024, 2)
+            cached = dict(self.engine._state_cache)
+
+            with patch("os.replace", side_effect=OSError("disk full")):
+                self.engine._update_state_file("failed", 0, 2)
+
+            self.assertEqual(self.engine._state_cache, cached)
+            self.assertEqual(os.listdir(tmp), ["backup_state.json"])
+
+    def test_parse_healthcheck_url_kuma_strips_status_and_msg(self):
+        kind, url = BackupEngine._parse_healthcheck_url("https://kuma.local/api/push/abc?status=up&msg=OK&ping=")
+
+        self.assertEqual(kind, "kuma")
+        self.assertEqual(url, "https://kuma.local/api/push/abc?")
+
+    def test_parse_healthcheck_url_hcio_and_empty(self):
+        self.assertEqual(BackupEngine._parse_healthcheck_url(" https://hc-ping.com/uuid/ "), ("hcio", "https://hc-ping.com/uuid"))
+        self.assertEqual(BackupEngine._parse_healthcheck_url(None), (None, ""))
+
+    def test_snapshot_relative_path_strips_hostfs_prefix(self):
+        self.assertEqual(BackupEngine._snapshot_relative_path("/hostfs/opt/npm/data"), "opt/npm/data")
+        self.assertEqual(BackupEngine._snapshot_relative_path("/var/lib/docker/volumes/x/_data"), "var/lib/docker/volumes/x/_data")
+
+    def test_cleanup_local_backups_only_removes_own_trash_dirs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.engine.backup_root = tmp
+            leftovers = ["temp_20240101_120000.trash.123", "temp_portainer_20240101_120000.trash.456"]
+            foreign = ["photos.trash.old", "temp_20240101_120000.trash.123.keep", "mytemp_20240101_120000.trash.1"]
+            in_progress = f"temp_20240101_130000.trash.{os.getpid()}"
+            for name in leftovers + foreign + [in_progress]:
+                os.makedirs(os.path.join(tmp, name, "sub"))
+
+            self.engine._cleanup_local_backups(7)
+
+            self.assertEqual(sorted(os.listdir(tmp)), sorted(foreign + [in_progress]))
+
+    @unittest.skipUnless(shutil.which("zstd") and shutil.which("openssl") and shutil.which("tar"), "zstd/openssl/tar not installed")
+    def test_compress_zstd_round_trips_with_readme_restore(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "src", "data"))
+            with open(os.path.join(tmp, "src", "data", "file.txt"), "w") as f:
+                f.write("hello backup\n")
+            archive = os.path.join(tmp, "Backup_test.tar.zst.enc")
+            self.engine.backup_password = "s3cret"
+
+            ok, error = self.engine._compress_zstd(archive, os.path.join(tmp, "src"), "data")
+            self.assertTrue(ok, error)
+
+            # README restore command, with the password from the environment instead of the prompt
+            out = os.path.join(tmp, "restore")
+            os.makedirs(out)
+            subprocess.run(
+                f"openssl enc -d -aes-256-ctr -pbkdf2 -pass env:BP -in {archive} | zstd -d | tar -xf -",
+                shell=True, cwd=out, check=True, env=dict(os.environ, BP="s3cret")
+            )
+            with open(os.path.join(out, "data", "file.txt")) as f:
+                self.assertEqual(f.read(), "hello backup\n")
+
+    @unittest.skipUnless(shutil.which("zstd") and shutil.which("openssl") and shutil.which("tar"), "zstd/openssl/tar not installed")
+    def test_compress_zstd_failure_removes_partial_archive(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            archive = os.path.join(tmp, "Backup_test.tar.zst.enc")
+            self.engine.backup_password = "s3cret"
+
+            ok, error = self.engine._compress_zstd(archive, tmp, "missing")
+
+            self.assertFalse(ok)
+            self.assertIn("missing", error)
+            self.assertFalse(os.path.exists(archive))
+
 if __name__ == '__main__':
     unittest.main()
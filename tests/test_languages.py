@@ -46,3 +46,19 @@ def test_get_text_empty_key():
     """Test requesting an empty key returns []"""
     result = get_text("en", "")
     assert result == "[]"
+
+def test_get_text_missing_key_in_supported_language_falls_back_to_english(monkeypatch):
+    """Test a key missing from a supported language falls back to the English text."""
+    from app import languages
+    monkeypatch.setitem(languages._FLAT, ("en", "only_in_english_key"), "English only")
+    languages.get_text.cache_clear()
+    assert get_text("tr", "only_in_english_key") == "English only"
+    languages.get_text.cache_clear()
+
+def test_get_table_matches_get_text():
+    """Test the per-language table agrees with get_text, including the English fallback."""
+    from app.languages import get_table
+    for lang in ("en", "tr", "de", "fr", None):
+        table = get_table(lang)
+        for key in TRANSLATIONS["en"]:
+            assert table[key] == get_text(lang, key)
@@ -68,5 +68,35 @@ class TestSecurity(unittest.TestCase):
         # Should return original value on error
         self.assertEqual(app.security.encrypt_value("my_secret"), "my_secret")
 
+    @patch('app.security._get_key')
+    def test_get_fernet_reuses_instance_per_key(self, mock_get_key):
+        from cryptography.fernet import Fernet
+        mock_get_key.return_value = Fernet.generate_key()
+
+        first = app.security._get_fernet()
+        self.assertIs(app.security._get_fernet(), first)
+
+        mock_get_key.return_value = Fernet.generate_key()
+        self.assertIsNot(app.security._get_fernet(), first)
+
+    @patch('app.security._get_key')
+    def test_encrypt_many(self, mock_get_key):
+        from cryptography.fernet import Fernet
+        key = Fernet.generate_key()
+        mock_get_key.return_value = key
+
+        result = app.security.encrypt_many(["a", "", "ENC(done)", "b"])
+
+        self.assertEqual(result[1:3], ["", "ENC(done)"])
+        f = Fernet(key)
+        self.assertEqual(f.decrypt(result[0][4:-1].encode()).decode(), "a")
+        self.assertEqual(f.decrypt(result[3][4:-1].encode()).decode(), "b")
+        mock_get_key.assert_called_once()
+
+    @patch('app.security._get_key')
+    def test_encrypt_many_exception(self, mock_get_key):
+        mock_get_key.side_effect = Exception("Mocked exception")
+        self.assertEqual(app.security.encrypt_many(["my_secret"]), ["my_secret"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,106 @@
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Mock dependencies that are not available in the test environment
+sys.modules['streamlit'] = MagicMock()
+sys.modules['docker'] = MagicMock()
+
+from app import ui
+
+class SessionState(dict):
+    """Minimal stand-in for st.session_state (dict with attribute access)."""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+class TestUI(unittest.TestCase):
+    def test_refresh_candidates_clears_cache_every_call(self):
+        session_state = {"candidates": ["old"]}
+        with patch.object(ui, "get_candidates") as mock_candidates, \
+             patch.object(ui.st, "session_state", session_state):
+            for _ in range(3):
+                session_state["candidates"] = ["old"]
+                ui.refresh_candidates()
+                self.assertNotIn("candidates", session_state)
+
+        self.assertEqual(mock_candidates.clear.call_count, 3)
+
+    def test_write_text_file_keeps_mode_and_symlink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = os.path.join(tmp, "rclone.conf")
+            link = os.path.join(tmp, "link.conf")
+            with open(target, "w") as f:
+                f.write("[old]\n")
+            os.chmod(target, 0o600)
+            os.symlink(target, link)
+
+            ui._write_text_file(link, "[new]\n")
+
+            self.assertTrue(os.path.islink(link))
+            with open(target) as f:
+                self.assertEqual(f.read(), "[new]\n")
+            self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0o600)
+            self.assertEqual(sorted(os.listdir(tmp)), ["link.conf", "rclone.conf"])
+
+    def test_write_text_file_new_file_is_private(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = os.path.join(tmp, "config.env")
+
+            ui._write_text_file(target, "A=1\n")
+
+            self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0o600)
+
+    def _save_env(self, env_path, updates):
+        fake_encrypt = lambda values: [f"ENC({value})" for value in values]
+        with patch.object(ui, "get_env_path", return_value=env_path), \
+             patch.object(ui, "encrypt_many", side_effect=fake_encrypt), \
+             patch.object(ui, "decrypt_value", side_effect=lambda v: v[4:-1] if v and v.startswith("ENC(") else (v or "")), \
+             patch.object(ui, "load_dotenv"):
+            return ui.save_env(updates)
+
+    def test_save_env_encrypts_hand_edited_plaintext_secret(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            env_path = os.path.join(tmp, "config.env")
+            with open(env_path, "w") as f:
+                f.write("LANGUAGE=en\nBACKUP_PASSWORD=hunter2\n")
+
+            self.assertTrue(self._save_env(env_path, {"LANGUAGE": "en", "BACKUP_PASSWORD": "hunter2"}))
+
+            with open(env_path) as f:
+                self.assertEqual(f.read(), "LANGUAGE=en\nBACKUP_PASSWORD=ENC(hunter2)\n")
+
+    def test_save_env_skips_write_when_unchanged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            env_path = os.path.join(tmp, "config.env")
+            with open(env_path, "w") as f:
+                f.write("LANGUAGE=en\nBACKUP_PASSWORD=ENC(hunter2)\n")
+            before = os.stat(env_path).st_mtime_ns
+
+            with patch.object(ui, "_write_text_file") as mock_write:
+                self.assertTrue(self._save_env(env_path, {"LANGUAGE": "en", "BACKUP_PASSWORD": "hunter2"}))
+
+            mock_write.assert_not_called()
+            self.assertEqual(os.stat(env_path).st_mtime_ns, before)
+
+    def test_rclone_prefill_rereads_after_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conf = os.path.join(tmp, "rclone.conf")
+            with open(conf, "w") as f:
+                f.write("[first]\n")
+            os.utime(conf, ns=(1_000_000_000, 1_000_000_000))
+            with patch.object(ui.st, "session_state", SessionState()), \
+                 patch.object(ui, "read_rclone_conf", side_effect=lambda path, mtime: ("", open(path).read().strip("[]\n"))):
+                self.assertEqual(ui.load_rclone_prefill(conf)[3], "first")
+
+                with open(conf, "w") as f:
+                    f.write("[second]\n")
+                self.assertEqual(ui.load_rclone_prefill(conf)[3], "second")
+
+                os.remove(conf)
+                self.assertEqual(ui.load_rclone_prefill(conf)[1:], (None, "", "remote"))
+
+if __name__ == '__main__':
+    unittest.main()